@@ -1,7 +1,209 @@
 import os
+import re
+import random
 import asyncio
-from typing import Dict, Any, Tuple
-from anthropic import AsyncAnthropic
+import hashlib
+import time
+from itertools import groupby
+from typing import Dict, Any, List, AsyncIterator, Optional, Union
+import orjson
+from anthropic import AsyncAnthropic, APIConnectionError, APIStatusError
+from monitor.events import PodEvent
+
+
+# Maximum number of simultaneous requests sent to Claude
+DEFAULT_CONCURRENCY = 5
+
+# Retry policy for rate limits and transient errors returned by the API
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 529})
+
+# Token bucket limiting the rate of requests sent to Claude, so a burst of
+# issues does not run into rate limits
+MAX_REQUESTS_PER_SECOND = 5.0
+REQUEST_BURST = 5
+
+# Approximate token budget for the logs excerpt sent to Claude
+LOG_TOKEN_BUDGET = 400
+CHARS_PER_TOKEN = 4
+
+# Bounds on the events included in the prompt
+MAX_PROMPT_EVENTS = 10
+MAX_EVENT_MESSAGE_LENGTH = 500
+
+# Logs larger than this many characters are analyzed by the smart model
+LARGE_LOGS_THRESHOLD = 4000
+
+# Volatile tokens stripped from logs so similar failures share a cache entry.
+# A single alternation lets normalize_logs replace all of them in one pass.
+LOG_NORMALIZATION_PATTERN = re.compile(
+    r"(?P<TS>\d{4}-\d{2}-\d{2}[T ][\d:.,]+(?:Z|[+-]\d{2}:?\d{2})?)"
+    r"|(?P<UUID>\b[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}\b)"
+    r"|(?P<IP>\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b)"
+    r"|(?P<HEX>\b(?:0x)?[0-9a-f]{8,}\b)",
+    re.IGNORECASE,
+)
+
+# Prompt sent to Claude, filled in with str.format for each issue
+PROMPT_TEMPLATE = """As a Kubernetes expert, analyze this issue and provide a VERY CONCISE diagnosis and recommendations.
+
+Your response will be displayed in the terminal, so:
+1. Keep your diagnosis under 200 characters if possible
+2. Provide no more than 3 specific, actionable recommendations
+3. Use simple formatting
+4. Be direct and to the point
+
+ISSUE DETAILS:
+- Resource Type: {resource_type}
+- Resource Name: {resource_name}
+- Issue Type: {issue_type}
+- Description: {description}
+
+LOGS:
+```
+{logs_excerpt}
+```
+
+EVENTS:
+```
+{events_text}
+```
+
+Report your analysis with the report_analysis tool:
+- diagnosis: 2-3 sentences explaining the root cause
+- recommendations: the specific, actionable recommendations, one per item
+"""
+
+# Tool used to get the diagnosis and recommendations as structured fields
+REPORT_TOOL = {
+    "name": "report_analysis",
+    "description": "Report the diagnosis and recommendations for a Kubernetes issue",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "diagnosis": {
+                "type": "string",
+                "description": "Root cause of the issue in 2-3 sentences",
+            },
+            "recommendations": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Specific, actionable recommendations",
+            },
+            "confident": {
+                "type": "boolean",
+                "description": (
+                    "False if the information provided is not enough to "
+                    "determine the root cause"
+                ),
+            },
+        },
+        "required": ["diagnosis", "recommendations", "confident"],
+    },
+}
+
+
+def prepare_logs(logs: str) -> str:
+    """
+    Collapses repeated consecutive lines and keeps the most recent lines that
+    fit in the token budget
+
+    Args:
+        logs: Raw log text
+
+    Returns:
+        Logs excerpt for the prompt
+    """
+    lines = []
+    for line, group in groupby(logs.strip().splitlines()):
+        repeats = sum(1 for _ in group)
+        lines.append(line if repeats == 1 else f"{line} [repeated {repeats} times]")
+
+    budget = LOG_TOKEN_BUDGET * CHARS_PER_TOKEN
+    excerpt = []
+    for line in reversed(lines):
+        budget -= len(line) + 1
+        if budget < 0:
+            break
+        excerpt.append(line)
+
+    if not excerpt and lines:
+        # A single line larger than the budget, keep its tail
+        return lines[-1][-LOG_TOKEN_BUDGET * CHARS_PER_TOKEN:]
+
+    return "\n".join(reversed(excerpt))
+
+
+def normalize_logs(logs: str) -> str:
+    """
+    Replaces timestamps, UUIDs, IPs and hex identifiers with placeholders
+
+    Args:
+        logs: Raw log text
+
+    Returns:
+        Log template shared by pods failing in the same way
+    """
+    return LOG_NORMALIZATION_PATTERN.sub(lambda match: f"<{match.lastgroup}>", logs)
+
+
+def get_cache_key(
+    issue_type: str,
+    resource_type: str,
+    reason: Optional[str],
+    description: str,
+    events: List[PodEvent],
+    logs: str,
+) -> str:
+    """
+    Builds the signature used to reuse analyses of equivalent issues
+
+    Args:
+        issue_type: Type of the detected issue
+        resource_type: Type of the affected resource
+        reason: Reason of the issue, e.g. the pod phase or container state
+        description: Description of the issue
+        events: Events related to the resource
+        logs: Logs excerpt sent to Claude
+
+    Returns:
+        Hex digest identifying the failure pattern
+    """
+    reasons = ",".join(sorted({event.reason or "" for event in events}))
+    signature = (
+        f"{issue_type}|{resource_type}|{reason or ''}|{description}|{reasons}|"
+        f"{normalize_logs(logs)}"
+    )
+    return hashlib.blake2b(signature.encode(), digest_size=16).hexdigest()
+
+
+def get_retry_delay(
+    error: Union[APIStatusError, APIConnectionError], attempt: int
+) -> float:
+    """
+    Computes how long to wait before retrying a failed request
+
+    Args:
+        error: The error returned by the Anthropic API, or the connection error
+        attempt: Zero-based number of the attempt that failed
+
+    Returns:
+        Delay in seconds, honoring the Retry-After header when present, up to
+        RETRY_MAX_DELAY
+    """
+    retry_after = None
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+    return delay + random.uniform(0, RETRY_BASE_DELAY)
 
 
 class ClaudeAnalyzer:
@@ -10,10 +212,22 @@ class ClaudeAnalyzer:
         if not self.api_key:
             raise ValueError("Anthropic API key is required. Set ANTHROPIC_API_KEY environment variable or pass it to the constructor.")
 
-        self.client = AsyncAnthropic(api_key=self.api_key)
-        self.model = "claude-3-7-sonnet-latest"
+        # Retries are handled by create_message to honor Retry-After
+        self.client = AsyncAnthropic(api_key=self.api_key, max_retries=0)
+        # Most issues are answered by the fast model, complex or uncertain
+        # ones are escalated to the smart model
+        self.fast_model = "claude-3-5-haiku-latest"
+        self.smart_model = "claude-3-7-sonnet-latest"
+
+        # Analyses indexed by failure signature, see get_cache_key. Requests
+        # still in flight are stored too, so equivalent issues await them
+        self._cache: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+        # Request tokens available, refilled over time by acquire_request_token
+        self._request_tokens = float(REQUEST_BURST)
+        self._request_tokens_updated_at = time.monotonic()
 
-    async def analyze_issue(self, issue: Dict[str, Any]) -> Dict[str, str]:
+    async def analyze_issue(self, issue: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyzes an issue using Claude and provides diagnosis and recommendations
 
@@ -32,94 +246,225 @@ class ClaudeAnalyzer:
 
             # Extract relevant information for context
             logs_excerpt = issue.get("logs", "")
+            logs_size = len(logs_excerpt) if isinstance(logs_excerpt, str) else 0
             if logs_excerpt and isinstance(logs_excerpt, str):
-                logs_excerpt = logs_excerpt[-1000:] if len(logs_excerpt) > 1000 else logs_excerpt
+                logs_excerpt = prepare_logs(logs_excerpt)
             else:
                 logs_excerpt = "No logs available"
 
             # Extract events
             events = issue.get("events", [])
-            events_text = ""
-            for event in events:
-                events_text += f"Type: {event.get('type', 'N/A')}, Reason: {event.get('reason', 'N/A')}, Message: {event.get('message', 'N/A')}\n"
-
-            # Prepare the prompt for Claude
-            prompt = f"""
-            As a Kubernetes expert, analyze this issue and provide a VERY CONCISE diagnosis and recommendations.
-
-            Your response will be displayed in the terminal, so:
-            1. Keep your diagnosis under 200 characters if possible
-            2. Provide no more than 3 specific, actionable recommendations
-            3. Use simple formatting
-            4. Be direct and to the point
-
-            ISSUE DETAILS:
-            - Resource Type: {resource_type}
-            - Resource Name: {resource_name}
-            - Issue Type: {issue_type}
-            - Description: {description}
-
-            LOGS:
-            ```
-            {logs_excerpt}
-            ```
-
-            EVENTS:
-            ```
-            {events_text}
-            ```
-
-            Format your response exactly like this:
-            Diagnosis: [2-3 sentences explaining the root cause]
-
-            Recommendations:
-            • [First recommendation]
-            • [Second recommendation]
-            • [Third recommendation]
-            • [Fourth recommendation]
-            • [Fifth recommendation]
-            """
-
-            # Send the request to Claude
-            message = await self.client.messages.create(
-                model=self.model,
-                max_tokens=1000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+            events_text = orjson.dumps([
+                {
+                    "type": event.type,
+                    "reason": event.reason,
+                    "message": (event.message or "")[:MAX_EVENT_MESSAGE_LENGTH],
+                    "count": event.count,
+                }
+                for event in events[-MAX_PROMPT_EVENTS:]
+            ]).decode() if events else "No events"
+
+            # Reuse the analysis of an issue with the same failure pattern,
+            # waiting for it if its request is still in flight
+            cache_key = get_cache_key(
+                issue_type, resource_type, issue.get("reason"), description,
+                events, logs_excerpt
             )
+            analysis_task = self._cache.get(cache_key)
+            if analysis_task is None:
+                # Prepare the prompt for Claude
+                prompt = PROMPT_TEMPLATE.format(
+                    resource_type=resource_type,
+                    resource_name=resource_name,
+                    issue_type=issue_type,
+                    description=description,
+                    logs_excerpt=logs_excerpt,
+                    events_text=events_text,
+                )
 
-            response_text = message.content[0].text
+                # Large logs and pods in an unknown state go straight to the
+                # smart model
+                use_smart_model = (
+                    logs_size > LARGE_LOGS_THRESHOLD or issue.get("reason") == "Unknown"
+                )
+                analysis_task = asyncio.ensure_future(
+                    self.request_analysis(prompt, use_smart_model)
+                )
+                self._cache[cache_key] = analysis_task
 
-            # Split the response into diagnosis and recommendations
-            parts = response_text.split("Recommendations:")
-            if len(parts) > 1:
-                diagnosis = parts[0].replace("Diagnosis:", "").strip()
-                recommendations = parts[1].strip()
-            else:
-                diagnosis = response_text
-                recommendations = "No specific recommendations provided"
+            try:
+                # Shielded so a cancelled caller does not cancel the request
+                # other issues are waiting for
+                analysis = await asyncio.shield(analysis_task)
+            except Exception:
+                # Only successful analyses are reused
+                if self._cache.get(cache_key) is analysis_task:
+                    del self._cache[cache_key]
+                raise
 
             return {
-                "diagnosis": diagnosis,
-                "recommendations": recommendations
+                "diagnosis": analysis["diagnosis"],
+                "recommendations": list(analysis["recommendations"]),
             }
 
         except Exception as e:
             error_message = f"Error processing with Claude: {str(e)}"
             return {
                 "diagnosis": error_message,
-                "recommendations": "Please check the logs for details"
+                "recommendations": ["Please check the logs for details"]
             }
 
-    def analyze_issue_sync(self, issue: Dict[str, Any]) -> Dict[str, str]:
+    async def request_analysis(
+        self, prompt: str, use_smart_model: bool
+    ) -> Dict[str, Any]:
+        """
+        Gets the diagnosis and recommendations for a prompt, escalating to the
+        smart model when the fast one is not confident
+
+        Args:
+            prompt: Prompt describing the issue
+            use_smart_model: Whether to skip the fast model
+
+        Returns:
+            Dict with diagnosis and recommendations
+        """
+        if use_smart_model:
+            report = await self.request_report(self.smart_model, prompt)
+        else:
+            report = await self.request_report(self.fast_model, prompt)
+            if not report.get("confident", True):
+                report = await self.request_report(self.smart_model, prompt)
+
+        # The tool input is not validated against its schema, models sometimes
+        # send the array as a single string
+        recommendations = report["recommendations"]
+        if isinstance(recommendations, str):
+            recommendations = [recommendations]
+        if not isinstance(recommendations, list) or not all(
+            isinstance(recommendation, str) for recommendation in recommendations
+        ):
+            raise ValueError("Claude reported recommendations that are not a list")
+
+        return {
+            "diagnosis": report["diagnosis"],
+            "recommendations": recommendations
+            or ["No specific recommendations provided"]
+        }
+
+    async def request_report(self, model: str, prompt: str) -> Dict[str, Any]:
+        """
+        Asks Claude for the analysis of an issue through the report tool
+
+        Args:
+            model: Claude model used for the analysis
+            prompt: Prompt describing the issue
+
+        Returns:
+            Input of the report tool call
+        """
+        message = await self.create_message(
+            model=model,
+            max_tokens=1000,
+            tools=[REPORT_TOOL],
+            tool_choice={"type": "tool", "name": REPORT_TOOL["name"]},
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+        report = next(
+            (block.input for block in message.content if block.type == "tool_use"),
+            None
+        )
+        if report is None:
+            raise ValueError("Claude did not report an analysis")
+        return report
+
+    async def create_message(self, **kwargs: Any) -> Any:
+        """
+        Sends a request to Claude, retrying with exponential backoff on rate
+        limits, overloads, transient server errors, timeouts and connection
+        errors
+
+        Args:
+            **kwargs: Arguments for messages.create
+
+        Returns:
+            The message returned by Claude
+        """
+        for attempt in range(MAX_RETRIES):
+            await self.acquire_request_token()
+            try:
+                return await self.client.messages.create(**kwargs)
+            except (APIStatusError, APIConnectionError) as e:
+                # APIConnectionError also covers timeouts
+                retryable = (
+                    isinstance(e, APIConnectionError)
+                    or e.status_code in RETRYABLE_STATUS_CODES
+                )
+                if not retryable or attempt == MAX_RETRIES - 1:
+                    raise
+                await asyncio.sleep(get_retry_delay(e, attempt))
+
+    async def acquire_request_token(self) -> None:
+        """
+        Waits until the token bucket allows sending another request to Claude
+        """
+        while True:
+            now = time.monotonic()
+            elapsed = now - self._request_tokens_updated_at
+            self._request_tokens = min(
+                REQUEST_BURST, self._request_tokens + elapsed * MAX_REQUESTS_PER_SECOND
+            )
+            self._request_tokens_updated_at = now
+            if self._request_tokens >= 1:
+                self._request_tokens -= 1
+                return
+            await asyncio.sleep((1 - self._request_tokens) / MAX_REQUESTS_PER_SECOND)
+
+    async def aclose(self) -> None:
+        """
+        Closes the HTTP connection pool shared by all the requests
+        """
+        await self.client.close()
+
+    async def iter_analyses(
+        self, issues: List[Dict[str, Any]], concurrency: int = DEFAULT_CONCURRENCY
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyzes several issues concurrently, yielding each analysis in the
+        order of issues as soon as it is ready
+
+        Args:
+            issues: List of objects with issue details
+            concurrency: Maximum number of simultaneous requests
+
+        Yields:
+            Dict with diagnosis and recommendations for each issue
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [
+            asyncio.ensure_future(self._bounded(semaphore, issue)) for issue in issues
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _bounded(
+        self, semaphore: asyncio.Semaphore, issue: Dict[str, Any]
+    ) -> Dict[str, Any]:
         """
-        Synchronous wrapper for analyze_issue
+        Analyzes an issue once the semaphore allows another request
 
         Args:
+            semaphore: Semaphore limiting the simultaneous requests
             issue: Object with issue details
 
         Returns:
             Dict with diagnosis and recommendations
         """
-        return asyncio.run(self.analyze_issue(issue))
+        async with semaphore:
+            return await self.analyze_issue(issue)
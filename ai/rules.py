@@ -0,0 +1,82 @@
+from typing import Dict, Any, Optional
+
+
+# Well-known failure reasons with a deterministic remediation, keyed by the
+# container or pod reason reported in the issue. These are answered without
+# calling Claude.
+RULES: Dict[str, Dict[str, Any]] = {
+    "ImagePullBackOff": {
+        "diagnosis": (
+            "The kubelet cannot pull the container image and is backing off "
+            "between retries. The image name or tag is wrong, the registry is "
+            "unreachable, or credentials are missing."
+        ),
+        "recommendations": [
+            "Check the image name and tag with 'kubectl describe pod' and the registry",
+            "Make sure the required imagePullSecrets exist in the namespace",
+            "Verify the nodes can reach the registry",
+        ],
+    },
+    "ErrImagePull": {
+        "diagnosis": (
+            "The kubelet failed to pull the container image. The image name or "
+            "tag is wrong, the registry is unreachable, or credentials are missing."
+        ),
+        "recommendations": [
+            "Check the image name and tag with 'kubectl describe pod' and the registry",
+            "Make sure the required imagePullSecrets exist in the namespace",
+            "Verify the nodes can reach the registry",
+        ],
+    },
+    "InvalidImageName": {
+        "diagnosis": (
+            "The container image reference cannot be parsed, so the kubelet never "
+            "tries to pull it."
+        ),
+        "recommendations": [
+            "Fix the image field of the container spec (registry/repository:tag)",
+            "Check for templating errors or empty variables in the manifest",
+        ],
+    },
+    "CreateContainerConfigError": {
+        "diagnosis": (
+            "The container cannot be created because its configuration references "
+            "a missing ConfigMap, Secret or key."
+        ),
+        "recommendations": [
+            "Run 'kubectl describe pod' to see which ConfigMap or Secret is missing",
+            "Create the missing resource or key in the same namespace",
+            "Check the names used in env, envFrom and volumes",
+        ],
+    },
+    "OOMKilled": {
+        "diagnosis": (
+            "The container exceeded its memory limit and was killed by the kernel "
+            "(OOMKilled)."
+        ),
+        "recommendations": [
+            "Increase the container memory limit if the usage is expected",
+            "Look for memory leaks or unbounded caches in the application",
+            "Compare requests and limits with the actual usage in 'kubectl top pod'",
+        ],
+    },
+}
+
+
+def match_rule(issue: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Looks up a static analysis for well-known failure reasons
+
+    Args:
+        issue: Object with issue details
+
+    Returns:
+        Dict with diagnosis and recommendations, or None if no rule applies
+    """
+    rule = RULES.get(issue.get("reason") or "")
+    if not rule:
+        return None
+    return {
+        "diagnosis": rule["diagnosis"],
+        "recommendations": list(rule["recommendations"]),
+    }
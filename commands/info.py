@@ -1,14 +1,14 @@
+from functools import lru_cache
+from typing import Tuple
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
-from rich.markdown import Markdown
 
 
 console = Console()
 
 
-def show_info():
-    info_text = """
+INFO_TEXT = """
     # Kubernetes Monitor CLI
 
     This tool allows you to monitor your Kubernetes clusters
@@ -25,16 +25,25 @@ def show_info():
     * Historical data tracking
     * Results export
     * Integration with external monitoring systems
+"""
+
+
+@lru_cache(maxsize=None)
+def get_info_renderables() -> Tuple[Panel, Table]:
     """
+    Builds the info panel and the usage examples table once
 
-    console.print(Panel(
-        Markdown(info_text),
+    Returns:
+        Tuple with the info panel and the usage examples table
+    """
+    from rich.markdown import Markdown
+
+    panel = Panel(
+        Markdown(INFO_TEXT),
         title="Kubernetes Monitor - Info",
         border_style="green",
         padding=(1, 2),
-    ))
-
-    console.print("\n[bold]Usage Examples:[/bold]")
+    )
 
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Command")
@@ -49,4 +58,12 @@ def show_info():
         "kai pods --kubeconfig ~/.kube/custom_path/config --namespace default,kube-system",
         "Monitor pods in the default and kube-system namespaces"
     )
+
+    return panel, table
+
+
+def show_info():
+    panel, table = get_info_renderables()
+    console.print(panel)
+    console.print("\n[bold]Usage Examples:[/bold]")
     console.print(table)
@@ -1,21 +1,141 @@
 import os
-from typing import List
-from rich.console import Console
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from monitor.pods import PodMonitor
+from display.console import console
 from display.pods import display_issue
+from ai.rules import match_rule
+
+def create_claude_analyzer() -> Optional[Any]:
+    """
+    Create a Claude analyzer if the API key is available
+
+    Returns:
+        ClaudeAnalyzer instance, or None if it could not be initialized
+    """
+    if not os.environ.get("ANTHROPIC_API_KEY"):
+        return None
 
-# Import Claude analyzer if API key is available
-claudeAnalyzer = None
-if os.environ.get("ANTHROPIC_API_KEY"):
     try:
         from ai.claude import ClaudeAnalyzer
-        claudeAnalyzer = ClaudeAnalyzer()
+        return ClaudeAnalyzer()
     except (ImportError, Exception) as e:
         print(f"Warning: Could not initialize Claude analyzer: {str(e)}")
+        return None
+
+
+def get_issue_signature(issue: Dict[str, Any]) -> Tuple[str, ...]:
+    """
+    Build the signature shared by issues with the same root cause, such as
+    every replica of a failing deployment
+
+    Args:
+        issue: The issue details
+
+    Returns:
+        Tuple identifying the group of equivalent issues
+    """
+    reasons = sorted({event.reason or "" for event in issue.get("events") or []})
+    return (
+        issue["namespace"],
+        issue["issue_type"],
+        issue.get("reason") or "",
+        issue.get("container") or "",
+        issue.get("owner") or issue["resource_name"],
+        ",".join(reasons),
+    )
+
+
+def report_issues(issues: List[Dict[str, Any]]):
+    """
+    Analyze and display the detected issues, answering well-known failures
+    from the rule table and sending the rest to Claude
+
+    Args:
+        issues: List of issues detected in the monitored namespaces
+    """
+    analyses: List[Optional[Dict[str, Any]]] = [match_rule(issue) for issue in issues]
+    if all(analyses):
+        for issue, analysis in zip(issues, analyses):
+            display_issue(issue, analysis)
+        return
+
+    # One analyzer per run, so every request shares its connection pool
+    claude_analyzer = create_claude_analyzer()
+    if not claude_analyzer:
+        console.print("[bold yellow]Claude AI API key is required for analysis.[/bold yellow]")
+        for issue, analysis in zip(issues, analyses):
+            display_issue(issue, analysis or {
+                "diagnosis": "Analysis could not be performed",
+                "recommendations": ["Set the ANTHROPIC_API_KEY environment variable to enable analysis with Claude AI."]
+            })
+        return
+
+    # uvloop schedules the concurrent Claude requests faster than the default
+    # event loop, it is optional as it does not support Windows
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+
+    with console.status("[cyan]Analyzing issues with Claude AI...[/cyan]"):
+        displayed = run(stream_claude_analysis(claude_analyzer, issues, analyses))
+
+    # Issues left behind if the analysis was interrupted
+    for issue, analysis in zip(issues[displayed:], analyses[displayed:]):
+        display_issue(issue, analysis or {
+            "diagnosis": "Error analyzing with Claude AI",
+            "recommendations": ["An active connection with Claude AI is required to analyze this issue."]
+        })
+
+
+async def stream_claude_analysis(
+    claude_analyzer: Any,
+    issues: List[Dict[str, Any]],
+    analyses: List[Optional[Dict[str, Any]]]
+) -> int:
+    """
+    Analyze the issues without a static analysis with Claude, displaying each
+    issue as soon as its analysis and those of the issues before it are ready
 
-console = Console()
+    Args:
+        claude_analyzer: ClaudeAnalyzer used for the analysis
+        issues: List of issues detected in the monitored namespaces
+        analyses: Known analyses, None for the issues pending analysis.
+            Filled in place with the analyses returned by Claude.
+
+    Returns:
+        Number of issues displayed
+    """
+    # Only one issue per group is sent to Claude, the rest reuse its analysis
+    pending_by_signature: Dict[Tuple[str, ...], List[int]] = {}
+    for index, analysis in enumerate(analyses):
+        if analysis is None:
+            signature = get_issue_signature(issues[index])
+            pending_by_signature.setdefault(signature, []).append(index)
+    representatives = [issues[indexes[0]] for indexes in pending_by_signature.values()]
+
+    def display_ready(start: int) -> int:
+        while start < len(issues) and analyses[start] is not None:
+            display_issue(issues[start], analyses[start])
+            start += 1
+        return start
+
+    displayed = display_ready(0)
+    try:
+        group_indexes = iter(pending_by_signature.values())
+        async for analysis in claude_analyzer.iter_analyses(representatives):
+            for index in next(group_indexes):
+                analyses[index] = analysis
+            displayed = display_ready(displayed)
+    except Exception as e:
+        console.print(f"[bold red]Error using Claude analyzer: {str(e)}[/bold red]")
+    finally:
+        await claude_analyzer.aclose()
+
+    return displayed
 
 
 def monitor_pods(kubeconfig: str, namespaces: List[str]):
@@ -27,6 +147,10 @@ def monitor_pods(kubeconfig: str, namespaces: List[str]):
         namespaces: List of namespaces to monitor
     """
     try:
+        # Imported here so commands that do not talk to the cluster skip loading
+        # the Kubernetes client
+        from monitor.pods import PodMonitor
+
         # Initialize the Pod monitor
         pod_monitor = PodMonitor(kubeconfig)
 
@@ -36,9 +160,7 @@ def monitor_pods(kubeconfig: str, namespaces: List[str]):
             border_style="green"
         ))
 
-        # Check each namespace
-        total_issues = 0
-
+        # Collect the issues of every namespace before analyzing them
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -46,42 +168,25 @@ def monitor_pods(kubeconfig: str, namespaces: List[str]):
         ) as progress:
             task = progress.add_task("[cyan]Scanning namespaces...", total=len(namespaces))
 
-            for namespace in namespaces:
-                progress.update(task, description=f"[cyan]Scanning namespace: {namespace}[/cyan]")
-                issues = pod_monitor.check_pod_health(namespace)
-                total_issues += len(issues)
-
-                for issue in issues:
-                    # Use Claude analyzer for analysis
-                    if claudeAnalyzer:
-                        try:
-                            analysis = claudeAnalyzer.analyze_issue_sync(issue)
-                        except Exception as e:
-                            console.print(f"[bold red]Error using Claude analyzer: {str(e)}[/bold red]")
-                            analysis = {
-                                "diagnosis": "Error analyzing with Claude AI",
-                                "recommendations": "An active connection with Claude AI is required to analyze this issue."
-                            }
-                    else:
-                        console.print("[bold yellow]Claude AI API key is required for analysis.[/bold yellow]")
-                        analysis = {
-                            "diagnosis": "Analysis could not be performed",
-                            "recommendations": "Set the ANTHROPIC_API_KEY environment variable to enable analysis with Claude AI."
-                        }
-
-                    display_issue(issue, analysis)
-
+            def on_scanned(namespace: str):
+                progress.update(
+                    task, description=f"[cyan]Scanned namespace: {namespace}[/cyan]"
+                )
                 progress.advance(task)
 
+            all_issues = pod_monitor.check_pods_in_namespaces(namespaces, on_scanned)
+
+        report_issues(all_issues)
+
         # Display summary
-        if total_issues == 0:
+        if not all_issues:
             console.print(Panel(
                 "[bold green]No issues detected in the monitored namespaces.[/bold green]",
                 border_style="green"
             ))
         else:
             console.print(Panel(
-                f"[bold yellow]Found {total_issues} issue(s) in the monitored namespaces.[/bold yellow]",
+                f"[bold yellow]Found {len(all_issues)} issue(s) in the monitored namespaces.[/bold yellow]",
                 border_style="yellow"
             ))
 
@@ -0,0 +1,6 @@
+from rich.console import Console
+
+
+# Console shared by every module that prints while a progress bar or status
+# spinner is live: rich only coordinates the output of its own Console
+console = Console()
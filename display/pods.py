@@ -1,13 +1,15 @@
-from typing import Dict, Any
-from rich.console import Console
+from typing import Dict, Any, List
+from rich.console import Group, RenderableType
 from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
+from display.console import console
 
 
-console = Console()
+SEVERITY_COLORS = {"High": "red", "Medium": "yellow", "Low": "blue"}
 
 
-def display_issue(issue: Dict[str, Any], analysis: Dict[str, str]):
+def display_issue(issue: Dict[str, Any], analysis: Dict[str, Any]):
     """
     Display an issue with its analysis in a rich format
 
@@ -16,25 +18,31 @@ def display_issue(issue: Dict[str, Any], analysis: Dict[str, str]):
         analysis: The AI analysis with diagnosis and recommendations
     """
     severity = issue.get("severity", "Medium")
-    severity_color = "red" if severity == "High" else "yellow" if severity == "Medium" else "blue"
+    severity_color = SEVERITY_COLORS.get(severity, "blue")
+
+    renderables: List[RenderableType] = [Text()]
 
     # Create the main panel
-    console.print()
-    console.print(Panel(
+    renderables.append(Panel(
         f"[bold {severity_color}]{issue['issue_type']}[/bold {severity_color}]: {issue['resource_name']}",
         title=f"[{severity_color}]Issue Detected in {issue['namespace']}[/{severity_color}]",
         border_style=severity_color
     ))
 
     # Display issue details
-    console.print(f"[bold]Description:[/bold] {issue['description']}")
-    console.print(f"[bold]Detected at:[/bold] {issue['detected_at']}")
-    console.print(f"[bold]Namespace:[/bold] {issue['namespace']}")
-    console.print()
+    renderables.append(Text.from_markup(
+        f"[bold]Description:[/bold] {issue['description']}\n"
+        f"[bold]Detected at:[/bold] {issue['detected_at']}\n"
+        f"[bold]Namespace:[/bold] {issue['namespace']}\n"
+    ))
 
     # Display AI analysis
-    console.print(Panel(
-        f"[bold]Diagnosis:[/bold]\n{analysis['diagnosis']}\n\n[bold]Recommendations:[/bold]\n{analysis['recommendations']}",
+    recommendations = "\n".join(
+        f"• {recommendation}" for recommendation in analysis["recommendations"]
+    )
+    renderables.append(Panel(
+        f"[bold]Diagnosis:[/bold]\n{analysis['diagnosis']}\n\n"
+        f"[bold]Recommendations:[/bold]\n{recommendations}",
         title="AI Analysis",
         border_style="green"
     ))
@@ -45,19 +53,15 @@ def display_issue(issue: Dict[str, Any], analysis: Dict[str, str]):
         if isinstance(logs, str):
             # Take only the last few lines to avoid overwhelming output
             log_lines = logs.strip().split("\n")
+            title = "Recent Logs"
             if len(log_lines) > 10:
-                log_excerpt = "\n".join(log_lines[-10:])
-                console.print(Panel(
-                    f"{log_excerpt}",
-                    title="Recent Logs (last 10 lines)",
-                    border_style="blue"
-                ))
-            else:
-                console.print(Panel(
-                    f"{logs}",
-                    title="Recent Logs",
-                    border_style="blue"
-                ))
+                logs = "\n".join(log_lines[-10:])
+                title = "Recent Logs (last 10 lines)"
+            renderables.append(Panel(
+                f"{logs}",
+                title=title,
+                border_style="blue"
+            ))
 
     # Display recent events
     if "events" in issue and issue["events"]:
@@ -70,14 +74,17 @@ def display_issue(issue: Dict[str, Any], analysis: Dict[str, str]):
             table.add_column("Count", justify="right")
 
             # Add the most recent events (up to 5)
-            for event in events[:5]:
+            for event in events[-5:]:
                 table.add_row(
-                    event.get("type", ""),
-                    event.get("reason", ""),
-                    event.get("message", ""),
-                    str(event.get("count", 1))
+                    event.type or "",
+                    event.reason or "",
+                    event.message or "",
+                    str(event.count or 1)
                 )
 
-            console.print(table)
+            renderables.append(table)
+
+    renderables.append(Text("\n" + "="*80 + "\n"))
 
-    console.print("\n" + "="*80 + "\n")
+    # Render the whole issue at once
+    console.print(Group(*renderables))
@@ -1,4 +1,5 @@
 import os
+import stat
 import typer
 from typing import Optional, Callable, Any
 from rich.console import Console
@@ -9,11 +10,13 @@ console = Console()
 
 def validate_kubeconfig(value: str) -> str:
     """Validate the kubeconfig file path."""
-    if not os.path.exists(value):
+    try:
+        mode = os.stat(value).st_mode
+    except OSError:
         console.print(f"[bold yellow]Warning:[/bold yellow] Kubeconfig file not found: {value}")
         return value
 
-    if not os.path.isfile(value):
+    if not stat.S_ISREG(mode):
         console.print(f"[bold yellow]Warning:[/bold yellow] Kubeconfig path is not a file: {value}")
         return value
 
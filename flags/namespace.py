@@ -1,3 +1,4 @@
+from itertools import chain
 from typing import List
 import typer
 from rich.console import Console
@@ -29,19 +30,7 @@ def process_namespaces(namespace_list: List[str]) -> List[str]:
     Returns:
         List of unique namespaces
     """
-    # Process namespaces - handle comma-separated values
-    processed_namespaces = []
-    for ns in namespace_list:
-        # Split by comma if present
-        if "," in ns:
-            processed_namespaces.extend([n.strip() for n in ns.split(",")])
-        else:
-            processed_namespaces.append(ns)
-
-    # Remove duplicates while preserving order
-    unique_namespaces = []
-    for ns in processed_namespaces:
-        if ns not in unique_namespaces:
-            unique_namespaces.append(ns)
-
-    return unique_namespaces
+    # Split comma-separated values and remove duplicates while preserving order
+    values = chain.from_iterable(value.split(",") for value in namespace_list)
+    namespaces = (ns.strip() for ns in values)
+    return list(dict.fromkeys(ns for ns in namespaces if ns))
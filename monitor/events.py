@@ -0,0 +1,13 @@
+from typing import NamedTuple, Optional
+
+
+class PodEvent(NamedTuple):
+    """
+    Kubernetes event related to a pod, kept as a tuple to avoid a dict per event
+    """
+    type: Optional[str]
+    reason: Optional[str]
+    message: Optional[str]
+    count: Optional[int]
+    first_timestamp: Optional[str]
+    last_timestamp: Optional[str]
@@ -1,31 +1,316 @@
-from typing import List, Dict, Any
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Iterator, Optional, Callable
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from rich.console import Console
+import orjson
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
+from display.console import console
+from monitor.events import PodEvent
 
 
-console = Console()
+# Succeeded pods are filtered out by the apiserver on purpose. A pod that
+# completed, such as a Job with restartPolicy OnFailure that eventually
+# succeeded, is no longer an issue even if it restarted more than
+# RESTART_THRESHOLD times on the way. Running pods are still listed:
+# crash-looping containers and restarts are reported while they run.
+POD_FIELD_SELECTOR = "status.phase!=Succeeded"
+
+# Default number of pods requested per page, so large namespaces are not
+# loaded in one response
+POD_PAGE_SIZE = 500
+
+# Container logs requested per issue. Only the tail is displayed and sent to
+# Claude. The apiserver applies the byte limit from the start of the tail, so
+# it is kept well above 50 ordinary lines (JSON logs, stack traces) and only
+# trims pathologically long lines; a tight limit would drop the newest lines.
+LOG_TAIL_LINES = 50
+LOG_LIMIT_BYTES = 32 * 1024
+
+# Seconds to wait for a log read, so an unresponsive kubelet cannot hold a log
+# worker for the whole scan
+LOG_REQUEST_TIMEOUT = 10
+
+# Events kept per pod, the ones seen least recently are dropped
+MAX_POD_EVENTS = 20
+
+# Maximum number of namespaces scanned at the same time
+MAX_SCAN_WORKERS = 16
+
+# Maximum number of container logs read at the same time, across all the
+# namespaces scanned in parallel
+MAX_LOG_WORKERS = 16
+
+# HTTP connections kept to the apiserver, enough for the namespaces scanned
+# in parallel plus MAX_LOG_WORKERS log reads
+CONNECTION_POOL_SIZE = 32
+
+# Pod phases reported as issues, "Running" and "Succeeded" are the healthy ones
+PROBLEMATIC_PHASES = frozenset(("Pending", "Failed", "Unknown"))
+
+# Containers restarting more often than this are reported
+RESTART_THRESHOLD = 5
+
+# Container issues that determine the issue type, as bit flags
+CRASH_LOOP_BACK_OFF = 1
+IMAGE_PULL_BACK_OFF = 2
+CREATE_CONTAINER_ERROR = 4
+OOM_KILLED = 8
+CONTAINER_REASON_FLAGS = {
+    "CrashLoopBackOff": CRASH_LOOP_BACK_OFF,
+    "ImagePullBackOff": IMAGE_PULL_BACK_OFF,
+    "CreateContainerError": CREATE_CONTAINER_ERROR,
+}
+
+
+def get_container_flags(
+    container_status: Dict[str, Any], container_reason: Optional[str]
+) -> int:
+    """
+    Classifies the issue of a container as bit flags
+
+    Args:
+        container_status: Status of the container, as returned by the API
+        container_reason: Waiting reason or termination summary of the container
+
+    Returns:
+        Bit flags of the issue types the container belongs to
+    """
+    flags = CONTAINER_REASON_FLAGS.get(container_reason, 0)
+    # A container crash looping after running out of memory is waiting in
+    # CrashLoopBackOff, the OOM kill is the reason of its last termination
+    terminated = (
+        container_status.get("state", {}).get("terminated")
+        or container_status.get("lastState", {}).get("terminated")
+        or {}
+    )
+    if terminated.get("reason") == "OOMKilled":
+        flags |= OOM_KILLED
+    return flags
+
+
+def container_has_run(
+    container_statuses: List[Dict[str, Any]], container_name: str
+) -> bool:
+    """
+    Checks whether a container has started at least once, so it has logs
+
+    Args:
+        container_statuses: Container statuses of the pod, as returned by the API
+        container_name: Name of the container
+
+    Returns:
+        False for containers that never started, e.g. stuck pulling their image
+    """
+    for cs in container_statuses:
+        if cs["name"] == container_name:
+            state = cs.get("state", {})
+            return (
+                "running" in state
+                or "terminated" in state
+                or "terminated" in cs.get("lastState", {})
+                or cs.get("restartCount", 0) > 0
+            )
+    return False
+
+
+@lru_cache(maxsize=4)
+def get_api_client(kubeconfig_path: Optional[str]) -> client.ApiClient:
+    """
+    Loads a kubeconfig once and builds an API client shared by every monitor
+    using it
+
+    Args:
+        kubeconfig_path: Path to the kubeconfig file
+
+    Returns:
+        API client with a connection pool sized for the parallel scans
+    """
+    configuration = client.Configuration()
+    config.load_kube_config(
+        config_file=kubeconfig_path, client_configuration=configuration
+    )
+    # Size the connection pool for the parallel namespace scans and log reads
+    configuration.connection_pool_maxsize = CONNECTION_POOL_SIZE
+    return client.ApiClient(configuration)
 
 
 class PodMonitor:
-    def __init__(self, kubeconfig_path: str):
+    def __init__(self, kubeconfig_path: str, page_size: int = POD_PAGE_SIZE):
         """
         Initialize the Pod monitor with the specified kubeconfig
 
         Args:
             kubeconfig_path: Path to the kubeconfig file
+            page_size: Number of pods requested per page when listing a namespace
         """
+        self.page_size = page_size
         try:
             # Load Kubernetes configuration
-            config.load_kube_config(config_file=kubeconfig_path)
-            self.core_api = client.CoreV1Api()
-            self.apps_api = client.AppsV1Api()
+            self.api_client = get_api_client(kubeconfig_path)
+
+            self.core_api = client.CoreV1Api(self.api_client)
+            self.log_semaphore = threading.BoundedSemaphore(MAX_LOG_WORKERS)
             console.print(f"[green]Successfully connected to Kubernetes cluster[/green]")
         except Exception as e:
             console.print(f"[bold red]Error connecting to Kubernetes cluster: {str(e)}[/bold red]")
             raise
 
+    def iter_pods(self, namespace: str) -> Iterator[Dict[str, Any]]:
+        """
+        Lists the pods of a namespace page by page
+
+        The responses are parsed as plain JSON instead of being deserialized
+        into V1Pod models, which is the slowest part of the Kubernetes client.
+
+        Args:
+            namespace: Kubernetes namespace to list
+
+        Yields:
+            Pods not in the Succeeded phase, as returned by the API
+        """
+        continue_token = None
+        while True:
+            response = self.core_api.list_namespaced_pod(
+                namespace=namespace,
+                field_selector=POD_FIELD_SELECTOR,
+                limit=self.page_size,
+                _continue=continue_token,
+                _preload_content=False
+            )
+            pods = orjson.loads(response.data)
+            yield from pods.get("items") or []
+
+            continue_token = pods.get("metadata", {}).get("continue")
+            if not continue_token:
+                break
+
+    def get_events_by_pod(self, namespace: str) -> Dict[str, List[PodEvent]]:
+        """
+        Fetches the pod events of a namespace in a single request
+
+        Args:
+            namespace: Kubernetes namespace to check
+
+        Returns:
+            Dict mapping pod names to their most recent distinct events, oldest
+            first
+        """
+        response = self.core_api.list_namespaced_event(
+            namespace=namespace,
+            field_selector="involvedObject.kind=Pod",
+            _preload_content=False
+        )
+
+        # Events of each pod indexed by type, reason and message, so repeated
+        # events keep a single entry with the highest count
+        events_by_pod = defaultdict(dict)
+        for event in orjson.loads(response.data).get("items") or []:
+            # Events written through the events.k8s.io API, e.g. by the
+            # scheduler, only have eventTime and series
+            series = event.get("series") or {}
+            pod_event = PodEvent(
+                event.get("type"),
+                event.get("reason"),
+                event.get("message"),
+                event.get("count") or series.get("count"),
+                event.get("firstTimestamp") or event.get("eventTime"),
+                event.get("lastTimestamp")
+                or series.get("lastObservedTime")
+                or event.get("eventTime")
+            )
+            pod_events = events_by_pod[event["involvedObject"]["name"]]
+            previous = pod_events.get(pod_event[:3])
+            if previous is None or (pod_event.count or 1) > (previous.count or 1):
+                pod_events[pod_event[:3]] = pod_event
+
+        # Oldest first, by the last time each event was seen. The RFC 3339
+        # timestamps of the API sort chronologically as strings once the
+        # fractional seconds of the event times are left out.
+        return {
+            pod_name: sorted(
+                pod_events.values(),
+                key=lambda pod_event: (
+                    pod_event.last_timestamp or pod_event.first_timestamp or ""
+                )[:19]
+            )[-MAX_POD_EVENTS:]
+            for pod_name, pod_events in events_by_pod.items()
+        }
+
+    def read_logs(self, namespace: str, pod_name: str, container_name: str) -> str:
+        """
+        Reads the most recent logs of a container
+
+        Args:
+            namespace: Kubernetes namespace of the pod
+            pod_name: Name of the pod
+            container_name: Name of the container
+
+        Returns:
+            Container logs, or the reason they could not be read
+        """
+        try:
+            with self.log_semaphore:
+                response = self.core_api.read_namespaced_pod_log(
+                    name=pod_name,
+                    namespace=namespace,
+                    container=container_name,
+                    tail_lines=LOG_TAIL_LINES,
+                    limit_bytes=LOG_LIMIT_BYTES,
+                    _preload_content=False,
+                    _request_timeout=LOG_REQUEST_TIMEOUT
+                )
+            # The byte limit may cut a multi-byte character in half
+            return response.data.decode("utf-8", "replace")
+        except Exception as e:
+            return f"Could not get logs: {str(e)}"
+
+    def attach_events(self, namespace: str, issues: List[Dict[str, Any]]) -> None:
+        """
+        Stores the related events in each issue, listing the events of the
+        namespace only if there is any issue
+
+        Args:
+            namespace: Kubernetes namespace of the pods
+            issues: Issues found in the namespace
+        """
+        if not issues:
+            return
+
+        events_by_pod = self.get_events_by_pod(namespace)
+        for issue in issues:
+            issue["events"] = events_by_pod.get(issue["resource_name"], [])
+
+    def attach_logs(
+        self, namespace: str, log_requests: List[Tuple[Dict[str, Any], str]]
+    ) -> None:
+        """
+        Reads the logs of several containers in parallel and stores them in
+        their issues
+
+        Args:
+            namespace: Kubernetes namespace of the pods
+            log_requests: Pairs of issue and name of the container to read
+        """
+        if not log_requests:
+            return
+
+        max_workers = min(MAX_LOG_WORKERS, len(log_requests))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            logs = executor.map(
+                lambda request: self.read_logs(
+                    namespace, request[0]["resource_name"], request[1]
+                ),
+                log_requests
+            )
+            # Replicas of a failing workload often print the very same logs,
+            # their issues share a single copy of the string
+            unique_logs = {}
+            for (issue, _), container_logs in zip(log_requests, logs):
+                issue["logs"] = unique_logs.setdefault(container_logs, container_logs)
+
     def check_pod_health(self, namespace: str) -> List[Dict[str, Any]]:
         """
         Checks the health of pods in a specific namespace
@@ -37,156 +322,154 @@ class PodMonitor:
             List of issue dictionaries
         """
         issues = []
+        # Issues waiting for the logs of a container
+        log_requests = []
         try:
             console.print(f"Checking pods in namespace: [cyan]{namespace}[/cyan]")
-            pods = self.core_api.list_namespaced_pod(namespace=namespace)
+            # All the issues found in one scan share the same timestamp
+            detected_at = datetime.now().isoformat()
 
-            for pod in pods.items:
-                pod_name = pod.metadata.name
-                pod_status = pod.status
+            for pod in self.iter_pods(namespace):
+                pod_name = pod["metadata"]["name"]
+                pod_status = pod.get("status", {})
+                container_statuses = pod_status.get("containerStatuses") or []
 
                 # Check pod phase (status)
-                pod_phase = pod_status.phase
-                problematic_phases = ["Pending", "Failed", "Unknown"]
+                pod_phase = pod_status.get("phase")
 
-                # Check for various container issues
+                # Check for various container issues, classifying them in a single pass
                 container_issues = {}
-                for cs in (pod_status.container_statuses or []):
-                    if cs.state.waiting:
-                        container_issues[cs.name] = cs.state.waiting.reason
-                    elif cs.state.terminated and cs.state.terminated.exit_code != 0:
-                        container_issues[cs.name] = f"Terminated(ExitCode:{cs.state.terminated.exit_code})"
-
-                # Check for specific issues
-                crash_loop_back_off = any(
-                    reason == "CrashLoopBackOff" for reason in container_issues.values()
-                )
-                image_pull_back_off = any(
-                    reason == "ImagePullBackOff" for reason in container_issues.values()
-                )
-                create_container_error = any(
-                    reason == "CreateContainerError" for reason in container_issues.values()
-                )
-                oom_killed = any(
-                    "OOMKilled" in reason for reason in container_issues.values()
-                )
+                container_flags = {}
+                reason_flags = 0
+                max_restarts = 0
+                for cs in container_statuses:
+                    max_restarts = max(max_restarts, cs.get("restartCount", 0))
+                    state = cs.get("state", {})
+                    if "waiting" in state:
+                        container_reason = state["waiting"].get("reason")
+                    elif state.get("terminated", {}).get("exitCode", 0) != 0:
+                        exit_code = state["terminated"]["exitCode"]
+                        container_reason = f"Terminated(ExitCode:{exit_code})"
+                    else:
+                        continue
 
-                if (pod_phase in problematic_phases or
-                    "Error" in pod_phase or
-                    crash_loop_back_off or
-                    image_pull_back_off or
-                    create_container_error or
-                    oom_killed):
-                    # Get pod logs if possible
-                    try:
-                        container_name = pod.spec.containers[0].name
-                        container_logs = self.core_api.read_namespaced_pod_log(
-                            name=pod_name,
-                            namespace=namespace,
-                            container=container_name,
-                            tail_lines=100
-                        )
-                    except Exception as e:
-                        container_logs = f"Could not get logs: {str(e)}"
-
-                    # Get related events
-                    field_selector = f"involvedObject.name={pod_name}"
-                    events = self.core_api.list_namespaced_event(
-                        namespace=namespace,
-                        field_selector=field_selector
-                    )
-
-                    event_messages = []
-                    for event in events.items:
-                        event_messages.append({
-                            "type": event.type,
-                            "reason": event.reason,
-                            "message": event.message,
-                            "count": event.count,
-                            "first_timestamp": event.first_timestamp,
-                            "last_timestamp": event.last_timestamp
-                        })
+                    container_issues[cs["name"]] = container_reason
+                    flags = get_container_flags(cs, container_reason)
+                    container_flags[cs["name"]] = flags
+                    reason_flags |= flags
+
+                # Healthy running pods are the common case, skip them right away
+                if (pod_phase == "Running" and not container_issues and
+                        max_restarts <= RESTART_THRESHOLD):
+                    continue
+
+                # Workload owning the pod, replicas of a failing workload share it
+                owner_references = pod["metadata"].get("ownerReferences") or []
+                owner = None
+                if owner_references:
+                    owner_reference = owner_references[0]
+                    owner = f"{owner_reference['kind']}/{owner_reference['name']}"
 
+                if pod_phase in PROBLEMATIC_PHASES or reason_flags:
                     # Determine the issue type and description
                     issue_type = "PodStatusIssue"
                     description = f"Pod is in {pod_phase} state"
+                    reason = pod_phase
+                    # Flag of the container issue that determined the type
+                    issue_flag = 0
+                    container = pod["spec"]["containers"][0]["name"]
 
-                    if crash_loop_back_off:
+                    # Running out of memory is checked first, it is the root
+                    # cause of the crash loop it usually leads to
+                    if reason_flags & OOM_KILLED:
+                        issue_type = "OOMKilled"
+                        description = "Pod was terminated due to out of memory"
+                        reason = "OOMKilled"
+                        issue_flag = OOM_KILLED
+                    elif reason_flags & CRASH_LOOP_BACK_OFF:
                         issue_type = "CrashLoopBackOff"
                         description = "Pod is in CrashLoopBackOff state"
-                    elif image_pull_back_off:
+                        reason = "CrashLoopBackOff"
+                        issue_flag = CRASH_LOOP_BACK_OFF
+                    elif reason_flags & IMAGE_PULL_BACK_OFF:
                         issue_type = "ImagePullBackOff"
                         description = "Pod has ImagePullBackOff error"
-                    elif create_container_error:
+                        reason = "ImagePullBackOff"
+                        issue_flag = IMAGE_PULL_BACK_OFF
+                    elif reason_flags & CREATE_CONTAINER_ERROR:
                         issue_type = "CreateContainerError"
                         description = "Pod failed to create container"
-                    elif oom_killed:
-                        issue_type = "OOMKilled"
-                        description = "Pod was terminated due to out of memory"
+                        reason = "CreateContainerError"
+                        issue_flag = CREATE_CONTAINER_ERROR
                     elif container_issues:
                         # Get the first issue if multiple exist
                         container, reason = next(iter(container_issues.items()))
                         issue_type = "ContainerError"
                         description = f"Container {container} has issue: {reason}"
 
-                    issues.append({
+                    if issue_flag:
+                        # First container with the issue that determined the type
+                        container = next(
+                            name for name, flags in container_flags.items()
+                            if flags & issue_flag
+                        )
+
+                    issue = {
                         "namespace": namespace,
                         "resource_type": "Pod",
                         "resource_name": pod_name,
+                        "container": container,
+                        "owner": owner,
                         "issue_type": issue_type,
+                        "reason": reason,
                         "severity": "High",
                         "description": description,
-                        "logs": container_logs,
-                        "events": event_messages,
-                        "detected_at": datetime.now().isoformat()
-                    })
+                        "logs": None,
+                        "events": [],
+                        "detected_at": detected_at
+                    }
+                    issues.append(issue)
+                    # Containers that never started have no logs to read
+                    if container_has_run(container_statuses, container):
+                        log_requests.append((issue, container))
 
                     # Continue to next pod after reporting status issue
                     continue
 
                 # Check container restarts
-                for container_status in pod_status.container_statuses or []:
-                    restart_count = container_status.restart_count
-                    if restart_count > 5:  # Restart threshold
-                        try:
-                            container_logs = self.core_api.read_namespaced_pod_log(
-                                name=pod_name,
-                                namespace=namespace,
-                                container=container_status.name,
-                                tail_lines=100
-                            )
-                        except Exception as e:
-                            container_logs = f"Could not get logs: {str(e)}"
-
-                        # Get related events
-                        field_selector = f"involvedObject.name={pod_name}"
-                        events = self.core_api.list_namespaced_event(
-                            namespace=namespace,
-                            field_selector=field_selector
+                for container_status in container_statuses:
+                    restart_count = container_status.get("restartCount", 0)
+                    if restart_count > RESTART_THRESHOLD:
+                        # Reason of the last termination, e.g. OOMKilled or Error
+                        last_state = container_status.get("lastState", {})
+                        last_terminated = last_state.get("terminated")
+                        reason = (
+                            last_terminated.get("reason") if last_terminated else None
                         )
 
-                        event_messages = []
-                        for event in events.items:
-                            event_messages.append({
-                                "type": event.type,
-                                "reason": event.reason,
-                                "message": event.message,
-                                "count": event.count,
-                                "first_timestamp": event.first_timestamp,
-                                "last_timestamp": event.last_timestamp
-                            })
-
-                        issues.append({
+                        issue = {
                             "namespace": namespace,
                             "resource_type": "Pod",
                             "resource_name": pod_name,
+                            "container": container_status["name"],
+                            "owner": owner,
                             "issue_type": "ContainerRestartIssue",
+                            "reason": reason,
                             "severity": "Medium",
-                            "description": f"Container {container_status.name} has restarted {restart_count} times",
-                            "logs": container_logs,
-                            "events": event_messages,
-                            "detected_at": datetime.now().isoformat()
-                        })
+                            "description": (
+                                f"Container {container_status['name']} has "
+                                f"restarted {restart_count} times"
+                            ),
+                            "logs": None,
+                            "events": [],
+                            "detected_at": detected_at
+                        }
+                        issues.append(issue)
+                        log_requests.append((issue, container_status["name"]))
+
+            # Events and logs are fetched once all the issues are known
+            self.attach_events(namespace, issues)
+            self.attach_logs(namespace, log_requests)
 
             return issues
         except ApiException as e:
@@ -195,3 +478,36 @@ class PodMonitor:
         except Exception as e:
             console.print(f"[bold red]Unexpected error checking pods in {namespace}: {str(e)}[/bold red]")
             return []
+
+    def check_pods_in_namespaces(
+        self, namespaces: List[str], on_scanned: Optional[Callable[[str], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Checks the health of pods in several namespaces in parallel
+
+        Args:
+            namespaces: Kubernetes namespaces to check
+            on_scanned: Called with the name of each namespace once it is scanned
+
+        Returns:
+            List of issue dictionaries, in the order of the namespaces
+        """
+        # The work is bound by API round-trips, so threads overlap them
+        issues_by_namespace = {}
+        max_workers = max(1, min(MAX_SCAN_WORKERS, len(namespaces)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.check_pod_health, namespace): namespace
+                for namespace in namespaces
+            }
+            for future in as_completed(futures):
+                namespace = futures[future]
+                issues_by_namespace[namespace] = future.result()
+                if on_scanned:
+                    on_scanned(namespace)
+
+        return [
+            issue
+            for namespace in namespaces
+            for issue in issues_by_namespace[namespace]
+        ]